@@ -3,10 +3,13 @@
 # License = GPLv3
 
 import tkinter as tk
-from tkinter import scrolledtext, font, messagebox, filedialog
+from tkinter import scrolledtext, font, messagebox, filedialog, simpledialog, ttk
 import re
 import os
 import sys
+import bisect
+import argparse
+from array import array
 
 import reportlab.lib.pagesizes as pagesizes
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
@@ -15,6 +18,198 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.colors import HexColor, Color
 
+# 헤더 줄 패턴 (H1-H6)
+# '#' 개수로 레벨을 지정하는 방식과 <Hn> 태그 방식(닫는 </H>는 생략 가능)을 모두 인식
+HEADER_LINE_PATTERN = re.compile(
+    r'^(?:(#+)(.*?)' # 그룹 1-2: '#' 헤더
+    r'|<H([1-6])>(.*?)(?:</H>)?)' # 그룹 3-4: <Hn> 헤더
+    r'[ \t]*$', re.MULTILINE | re.IGNORECASE
+)
+
+HEX_COLOR_VALUE_PATTERN = re.compile(r'(?:[\da-f]{3}){1,2}', re.IGNORECASE) # 3자리 또는 6자리 HEX
+
+def pgml_color_to_hex(name=None, hex_value=None, numbers=()):
+    # PGML 색상 지정(색상명, HEX 값, RGB/CMYK 값)을 "#rrggbb"로 변환 (변환할 수 없으면 None)
+    # 생략된 RGB/CMYK 값은 0으로 보고, 범위를 벗어난 값은 허용 범위로 잘라냄 (잘못된 값은 진단에서 표시)
+    if name:
+        if HEX_COLOR_VALUE_PATTERN.fullmatch(name):
+            hex_value = name # '#'을 생략한 HEX 값 (예: C=FF0000)
+        else:
+            rgb = MarkupEditor.PREDEFINED_COLORS.get(name.lower())
+            return f"#{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}" if rgb else None
+    if hex_value:
+        if not HEX_COLOR_VALUE_PATTERN.fullmatch(hex_value):
+            return None
+        if len(hex_value) == 3: # 3자리 HEX를 6자리로 확장
+            hex_value = ''.join([c*2 for c in hex_value])
+        return f"#{hex_value.lower()}"
+
+    values = [int(value) if value else 0 for value in numbers]
+    if len(values) == 4: # CMYK (C, M, Y, K)
+        c, m, y, k = (min(value, 100) for value in values)
+        # CMYK를 RGB로 변환 (ReportLab은 CMYK 직접 지원 안함, Tkinter도 마찬가지)
+        r = int(255 * (1 - c/100) * (1 - k/100))
+        g = int(255 * (1 - m/100) * (1 - k/100))
+        b = int(255 * (1 - y/100) * (1 - k/100))
+        return f"#{r:02x}{g:02x}{b:02x}"
+    if len(values) == 3: # RGB (R, G, B)
+        r, g, b = (min(value, 255) for value in values)
+        return f"#{r:02x}{g:02x}{b:02x}"
+    return None
+
+def header_level_and_title(match):
+    # HEADER_LINE_PATTERN 매치에서 (레벨, 제목)을 추출
+    if match.group(1):
+        return min(len(match.group(1)), 6), match.group(2).strip() # H1에서 H6까지만 지원
+    return int(match.group(3)), match.group(4).strip()
+
+
+class HeaderIndex:
+    # 문서의 헤더 위치를 줄 단위로 관리하는 인덱스
+    # 매번 문서 전체를 다시 검사하지 않고, 이전 내용과 달라진 줄 범위만 다시 파싱합니다.
+    def __init__(self):
+        self.lines = [] # 마지막으로 반영된 문서의 줄 목록
+        self.header_lines = [] # 헤더가 있는 줄 번호 (0부터 시작, 오름차순)
+        self.entries = [] # header_lines와 같은 순서의 (헤더 id, 레벨, 제목)
+        self._positions = {} # 헤더 id -> 문서 내 헤더 순번
+        self._next_id = 0
+        self.last_update_position = 0 # 마지막 update에서 바뀐 범위의 첫 헤더 순번
+
+    def update(self, text):
+        # 새 문서 내용을 반영하고 (제거된 항목, 추가된 항목)을 반환
+        # 헤더 구성이 바뀌지 않았다면 두 목록 모두 비어 있습니다.
+        old_lines = self.lines
+        new_lines = text.split("\n")
+        self.lines = new_lines
+
+        # 앞뒤로 동일한 줄을 건너뛰어 변경된 줄 범위를 찾음
+        limit = min(len(old_lines), len(new_lines))
+        start = 0
+        while start < limit and old_lines[start] == new_lines[start]:
+            start += 1
+        old_end, new_end = len(old_lines), len(new_lines)
+        while old_end > start and new_end > start and old_lines[old_end - 1] == new_lines[new_end - 1]:
+            old_end -= 1
+            new_end -= 1
+        if start == old_end and start == new_end:
+            return [], []
+
+        lo = bisect.bisect_left(self.header_lines, start)
+        hi = bisect.bisect_left(self.header_lines, old_end)
+        removed = self.entries[lo:hi]
+
+        # 변경된 줄만 다시 파싱
+        # 기존 헤더 id는 한 줄만 수정한 경우이거나 레벨과 제목이 같은 헤더에만 재사용하여 접힘 상태 등을 유지
+        # (다른 헤더로 바뀐 줄이 이전 헤더의 접힘 상태를 물려받지 않도록)
+        single_line_edit = old_end - start == 1 and new_end - start == 1
+        reusable_ids = {} # (레벨, 제목) -> 재사용할 수 있는 헤더 id 목록
+        for header_id, level, title in removed:
+            reusable_ids.setdefault((level, title), []).append(header_id)
+        added_lines = []
+        added = []
+        for line_number in range(start, new_end):
+            match = HEADER_LINE_PATTERN.match(new_lines[line_number])
+            if not match:
+                continue
+            level, title = header_level_and_title(match)
+            same_header_ids = reusable_ids.get((level, title))
+            if single_line_edit and removed:
+                header_id = removed[0][0]
+            elif same_header_ids:
+                header_id = same_header_ids.pop(0)
+            else:
+                header_id = self._next_id
+                self._next_id += 1
+            added_lines.append(line_number)
+            added.append((header_id, level, title))
+
+        # 변경 범위 뒤의 헤더는 줄 번호만 이동
+        delta = new_end - old_end
+        shifted_lines = [line_number + delta for line_number in self.header_lines[hi:]]
+        self.header_lines[lo:] = added_lines + shifted_lines
+        self.entries[lo:hi] = added
+        self.last_update_position = lo
+
+        if removed == added:
+            # 헤더 내용은 그대로이고 줄 위치만 바뀐 경우
+            return [], []
+        self._positions = {entry[0]: i for i, entry in enumerate(self.entries)}
+        return removed, added
+
+    def position(self, header_id):
+        # 헤더 id의 문서 내 순번 (없으면 None)
+        return self._positions.get(header_id)
+
+
+class SourceMap:
+    # 변환 전 텍스트(원본)와 변환 후 텍스트(대상) 사이의 오프셋 대응표
+    # 원본에서 그대로 복사된 구간만 (대상 시작, 원본 시작, 길이)로 기록하며,
+    # 두 시작 오프셋 모두 오름차순이므로 양방향 모두 이진 탐색으로 조회합니다.
+    # 기록되지 않은 구간(제거된 태그, [N] 등 새로 생성된 텍스트)은 가장 가까운 앞 구간의 끝으로 대응됩니다.
+    def __init__(self):
+        self.targets = array('q')
+        self.sources = array('q')
+        self.lengths = array('q')
+
+    def add(self, target, source, length):
+        if length <= 0:
+            return
+        # 바로 앞 구간과 이어지면 하나로 합침
+        if self.lengths and self.targets[-1] + self.lengths[-1] == target and self.sources[-1] + self.lengths[-1] == source:
+            self.lengths[-1] += length
+            return
+        self.targets.append(target)
+        self.sources.append(source)
+        self.lengths.append(length)
+
+    @staticmethod
+    def _lookup(keys, values, lengths, offset):
+        i = bisect.bisect_right(keys, offset) - 1
+        if i < 0:
+            return values[0] if values else 0
+        return values[i] + min(offset - keys[i], lengths[i])
+
+    def to_target(self, source_offset):
+        return self._lookup(self.sources, self.targets, self.lengths, source_offset)
+
+    def to_source(self, target_offset):
+        return self._lookup(self.targets, self.sources, self.lengths, target_offset)
+
+    def compose(self, inner):
+        # self(대상 <- 중간)와 inner(중간 <- 원본)를 합쳐 (대상 <- 원본) 대응표를 만듦
+        composed = SourceMap()
+        j = 0
+        inner_count = len(inner.targets)
+        for target, middle, length in zip(self.targets, self.sources, self.lengths):
+            middle_end = middle + length
+            # 현재 구간보다 앞에서 끝나는 inner 구간은 건너뜀 (두 표 모두 오름차순)
+            while j < inner_count and inner.targets[j] + inner.lengths[j] <= middle:
+                j += 1
+            k = j
+            while k < inner_count and inner.targets[k] < middle_end:
+                overlap_start = max(middle, inner.targets[k])
+                overlap_end = min(middle_end, inner.targets[k] + inner.lengths[k])
+                composed.add(target + overlap_start - middle, inner.sources[k] + overlap_start - inner.targets[k], overlap_end - overlap_start)
+                k += 1
+        return composed
+
+
+def line_start_offsets(text):
+    # 각 줄의 시작 오프셋 목록 (Tk 텍스트 인덱스 <-> 문자 오프셋 변환용)
+    starts = array('q', [0])
+    starts.extend(match.end() for match in re.finditer("\n", text))
+    return starts
+
+def offset_to_text_index(line_starts, offset):
+    line = bisect.bisect_right(line_starts, offset) - 1
+    return f"{line + 1}.{offset - line_starts[line]}"
+
+def text_index_to_offset(line_starts, text_index):
+    line, column = map(int, text_index.split("."))
+    line = min(line, len(line_starts)) - 1
+    return line_starts[line] + column
+
+
 class MarkupEditor:
     # 사전 정의된 색상 맵 (대소문자 무시)
     PREDEFINED_COLORS = {
@@ -37,6 +232,20 @@ class MarkupEditor:
         self.current_file_path = None # 현재 편집 중인 파일 경로
         self.modified = False # 문서 수정 여부 플래그
 
+        # 개요(outline) 패널용 헤더 인덱스와 접힌 섹션의 헤더 id 집합
+        self.header_index = HeaderIndex()
+        self.collapsed_headers = set()
+        self.preview_header_marks = [] # 미리보기에 설정된 헤더 마크 이름 목록
+
+        # 편집기 <-> 미리보기 스크롤 동기화용 위치 대응표와 줄 시작 오프셋
+        self.preview_source_map = SourceMap()
+        self.editor_line_starts = array('q', [0])
+        self.preview_line_starts = array('q', [0])
+
+        # 편집기 진단 (블록 단위로 결과를 캐시)
+        self.diagnostics_engine = DiagnosticsEngine()
+        self.diagnostics = [] # (시작 오프셋, 끝 오프셋, 메시지)
+
         # 사용할 기본 글꼴 설정 (시스템 폰트 사용)
         self.base_font_size = 12
         
@@ -83,6 +292,16 @@ class MarkupEditor:
         self.bind_events()
 
     def setup_ui(self):
+        # 상태 표시줄 (진단 메시지 표시, 가장 아래에 배치)
+        self.status_label = tk.Label(self.root, anchor="w")
+        self.status_label.pack(fill="x", side="bottom", padx=5)
+
+        # 개요 패널 (가장 왼쪽에 배치)
+        # 클릭하면 해당 헤더로 이동하고, 더블클릭하면 섹션을 접거나 펼칩니다.
+        self.outline_tree = ttk.Treeview(self.root, show="tree", selectmode="browse")
+        self.outline_tree.column("#0", width=200)
+        self.outline_tree.pack(fill="y", side="left", padx=5, pady=5)
+
         # 미리보기 텍스트 위젯 (왼쪽에 배치)
         self.preview_text = scrolledtext.ScrolledText(
             self.root, wrap=tk.WORD, font=(self.base_font_family, self.base_font_size)
@@ -96,6 +315,8 @@ class MarkupEditor:
         )
         self.text_editor.pack(expand=True, fill="both", side="right", padx=5, pady=5)
         self.text_editor.bind("<<Modified>>", self.on_text_modified)
+        # 편집기 스크롤 시 미리보기를 같은 위치로 이동
+        self.text_editor.config(yscrollcommand=self.on_editor_scroll)
 
         # 메뉴 바
         menubar = tk.Menu(self.root)
@@ -111,12 +332,28 @@ class MarkupEditor:
         file_menu.add_separator()
         file_menu.add_command(label="끝내기", command=self.root.quit)
 
+        # 일괄 변환 메뉴 (문서 전체에 한 번에 적용)
+        edit_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="편집", menu=edit_menu)
+        edit_menu.add_command(label="찾아 바꾸기", command=self.find_and_replace)
+        edit_menu.add_separator()
+        edit_menu.add_command(label="색상명을 HEX로 일괄 변환", command=lambda: self.apply_bulk_transform(build_bulk_transform(colors_to_hex=True)))
+        edit_menu.add_command(label="# 헤더를 <Hn> 태그로 일괄 변환", command=lambda: self.apply_bulk_transform(build_bulk_transform(headers_to_tags=True)))
+
     def bind_events(self):
         # 텍스트 편집기 내용 변경 감지
         self.text_editor.bind("<KeyRelease>", self.update_preview_delayed)
         # Ctrl+S 단축키 바인딩
         self.root.bind("<Control-s>", lambda event: self.save_document())
         self.root.bind("<Control-S>", lambda event: self.save_document()) # 대문자 S도 처리 (Shift + s)
+        # 진단 밑줄 위에 마우스를 올리면 상태 표시줄에 메시지 표시
+        self.text_editor.tag_bind("diagnostic", "<Enter>", self.show_diagnostic_at_pointer)
+        self.text_editor.tag_bind("diagnostic", "<Leave>", lambda event: self.show_diagnostics_summary())
+        # 미리보기 클릭 시 편집기의 해당 원본 위치로 이동
+        self.preview_text.bind("<ButtonRelease-1>", self.on_preview_click)
+        # 개요 패널 클릭/더블클릭
+        self.outline_tree.bind("<<TreeviewSelect>>", self.on_outline_select)
+        self.outline_tree.bind("<Double-1>", self.on_outline_double_click)
 
     def on_text_modified(self, event=None):
         self.modified = True
@@ -131,11 +368,186 @@ class MarkupEditor:
 
     def update_preview(self):
         raw_text = self.text_editor.get("1.0", tk.END)
+        # 변경된 줄만 반영하여 개요 패널 갱신
+        self.update_outline(raw_text)
+        # 접힌 섹션은 헤더 순번으로 전달하여 미리보기 렌더링에서 제외
+        collapsed_positions = {self.header_index.position(header_id) for header_id in self.collapsed_headers}
         # 미리보기 처리를 위해 각주 및 헤더를 임시 태그로 변환
-        processed_text_for_preview = self.process_markup_for_preview(raw_text)
+        # 진단은 렌더링보다 먼저 표시 (렌더링 중 오류가 나더라도 문제 위치는 보이도록)
+        self.editor_line_starts = line_start_offsets(raw_text)
+        self.update_diagnostics(raw_text)
+        processed_text_for_preview = self.process_markup_for_preview(raw_text, collapsed_positions)
         self.apply_styles_to_preview(processed_text_for_preview)
+        # 새로 렌더링된 미리보기를 편집기 위치에 맞춤 (갱신 시 미리보기가 맨 위로 튀는 것 방지)
+        self.sync_preview_scroll()
+
+    def update_diagnostics(self, raw_text):
+        # 바뀐 블록만 다시 검사하고, 진단 위치에 밑줄 표시
+        self.diagnostics = self.diagnostics_engine.run(raw_text)
+        self.text_editor.tag_remove("diagnostic", "1.0", tk.END)
+        indices = []
+        for start, end, message in self.diagnostics:
+            indices.append(offset_to_text_index(self.editor_line_starts, start))
+            indices.append(offset_to_text_index(self.editor_line_starts, end))
+        if indices:
+            self.text_editor.tag_add("diagnostic", *indices)
+        self.show_diagnostics_summary()
+
+    def show_diagnostics_summary(self):
+        self.status_label.config(text=f"문제 {len(self.diagnostics)}개" if self.diagnostics else "")
+
+    def show_diagnostic_at_pointer(self, event):
+        pointer_offset = text_index_to_offset(self.editor_line_starts, self.text_editor.index(f"@{event.x},{event.y}"))
+        for start, end, message in self.diagnostics:
+            if start <= pointer_offset < end:
+                self.status_label.config(text=message)
+                return
+
+    def on_editor_scroll(self, first, last):
+        self.text_editor.vbar.set(first, last) # ScrolledText 기본 스크롤바 갱신
+        self.sync_preview_scroll()
+
+    def sync_preview_scroll(self):
+        # 편집기 화면 맨 위 위치를 대응표로 변환하여 미리보기도 같은 위치를 맨 위에 표시
+        editor_offset = text_index_to_offset(self.editor_line_starts, self.text_editor.index("@0,0"))
+        preview_offset = self.preview_source_map.to_target(editor_offset)
+        self.preview_text.yview(offset_to_text_index(self.preview_line_starts, preview_offset))
+
+    def on_preview_click(self, event):
+        # 클릭한 미리보기 위치의 원본 위치로 편집기 커서 이동
+        # 드래그로 텍스트를 선택한 경우와 각주 링크 클릭(각주 목록으로 이동)은 제외
+        if self.preview_text.tag_ranges(tk.SEL):
+            return
+        preview_index = self.preview_text.index(f"@{event.x},{event.y}")
+        if any(tag.startswith("fn_link_") for tag in self.preview_text.tag_names(preview_index)):
+            return
+        preview_offset = text_index_to_offset(self.preview_line_starts, preview_index)
+        editor_offset = self.preview_source_map.to_source(preview_offset)
+        editor_index = offset_to_text_index(self.editor_line_starts, editor_offset)
+        self.text_editor.mark_set(tk.INSERT, editor_index)
+        self.text_editor.see(editor_index)
+
+    def update_outline(self, raw_text):
+        removed, added = self.header_index.update(raw_text)
+        if not removed and not added:
+            return # 헤더 구성이 바뀌지 않았으면 트리를 그대로 둠 (편집기 마크는 Tk가 자동으로 이동)
+
+        # 사라진 헤더의 마크 제거, 새 헤더 위치에 마크 설정
+        for header_id, level, title in removed:
+            self.text_editor.mark_unset(f"outline_hdr_{header_id}")
+        for header_id, level, title in added:
+            mark_name = f"outline_hdr_{header_id}"
+            line_number = self.header_index.header_lines[self.header_index.position(header_id)]
+            self.text_editor.mark_set(mark_name, f"{line_number + 1}.0")
+            self.text_editor.mark_gravity(mark_name, tk.LEFT)
+
+        # 더 이상 존재하지 않는 헤더의 접힘 상태 정리
+        self.collapsed_headers = {header_id for header_id in self.collapsed_headers if self.header_index.position(header_id) is not None}
+        self.update_outline_tree(removed, added)
+
+    def update_outline_tree(self, removed, added):
+        # 바뀐 헤더의 트리 항목만 삭제/추가/수정하고, 부모가 달라질 수 있는 뒤쪽 항목만 다시 배치
+        # (나머지 항목의 펼침 상태와 트리 스크롤 위치는 그대로 유지됨)
+        tree = self.outline_tree
+        entries = self.header_index.entries
+        added_ids = {header_id for header_id, level, title in added}
+        for header_id, level, title in removed:
+            if header_id in added_ids:
+                continue
+            item_id = f"hdr_{header_id}"
+            # 하위 항목은 아래에서 다시 배치되므로 함께 삭제되지 않도록 먼저 분리
+            for child_id in tree.get_children(item_id):
+                tree.move(child_id, "", tk.END)
+            tree.delete(item_id)
+
+        start = self.header_index.last_update_position
+        end = start + len(added)
+        lowest_level = min(level for header_id, level, title in removed + added)
+
+        # 변경 범위 직전 헤더와 그 상위 항목들로 부모 후보 스택 구성 (레벨, 트리 항목 id)
+        parents = []
+        item_id = f"hdr_{entries[start - 1][0]}" if start > 0 else ""
+        while item_id:
+            parents.append((entries[self.header_index.position(int(item_id[len("hdr_"):]))][1], item_id))
+            item_id = tree.parent(item_id)
+        parents.reverse()
+
+        for position in range(start, len(entries)):
+            header_id, level, title = entries[position]
+            if position >= end and level <= lowest_level:
+                break # 이후 헤더의 부모는 변경 범위의 영향을 받지 않음
+            while parents and parents[-1][0] >= level:
+                parents.pop()
+            parent_item = parents[-1][1] if parents else ""
+
+            # 문서 순서상 바로 앞의 형제 항목 (직전 헤더에서 부모 바로 아래 단계까지 올라감)
+            previous_item = f"hdr_{entries[position - 1][0]}" if position > 0 else ""
+            while previous_item and previous_item != parent_item and tree.parent(previous_item) != parent_item:
+                previous_item = tree.parent(previous_item)
+            if previous_item == parent_item:
+                previous_item = "" # 부모의 첫 번째 하위 항목
+            tree_index = tree.index(previous_item) + 1 if previous_item else 0
+
+            item_id = f"hdr_{header_id}"
+            if not tree.exists(item_id):
+                tree.insert(parent_item, tree_index, iid=item_id, text=self.outline_item_text(header_id, title), open=True)
+            else:
+                if tree.parent(item_id) != parent_item or tree.prev(item_id) != previous_item:
+                    tree.move(item_id, parent_item, tree_index)
+                if position < end:
+                    tree.item(item_id, text=self.outline_item_text(header_id, title))
+            parents.append((level, item_id))
+
+    def reset_outline(self):
+        # 개요 패널의 마크, 트리 항목, 헤더 인덱스, 접힘 상태를 모두 비움 (다음 update_preview에서 전체 재구성)
+        for header_id, level, title in self.header_index.entries:
+            self.text_editor.mark_unset(f"outline_hdr_{header_id}")
+        self.outline_tree.delete(*self.outline_tree.get_children())
+        self.header_index = HeaderIndex()
+        self.collapsed_headers = set()
+
+    def outline_item_text(self, header_id, title):
+        display_title = title if title else "(제목 없음)"
+        if header_id in self.collapsed_headers:
+            display_title = "▸ " + display_title # 접힌 섹션 표시
+        return display_title
+
+    def on_outline_select(self, event=None):
+        selection = self.outline_tree.selection()
+        if selection:
+            self.jump_to_header(int(selection[0][len("hdr_"):]))
+
+    def on_outline_double_click(self, event):
+        item_id = self.outline_tree.identify_row(event.y)
+        if not item_id:
+            return "break"
+        header_id = int(item_id[len("hdr_"):])
+        # 섹션 접기/펼치기 (접힌 섹션은 미리보기에서 렌더링하지 않음)
+        if header_id in self.collapsed_headers:
+            self.collapsed_headers.discard(header_id)
+        else:
+            self.collapsed_headers.add(header_id)
+        title = self.header_index.entries[self.header_index.position(header_id)][2]
+        self.outline_tree.item(item_id, text=self.outline_item_text(header_id, title))
+        self.outline_tree.selection_set(item_id)
+        self.update_preview()
+        return "break" # 트리 항목의 기본 열기/닫기 동작 방지
+
+    def jump_to_header(self, header_id):
+        # 저장된 마크를 통해 편집기와 미리보기를 해당 헤더로 이동
+        try:
+            self.text_editor.mark_set(tk.INSERT, f"outline_hdr_{header_id}")
+            self.text_editor.see(tk.INSERT)
+        except tk.TclError:
+            return # 마크가 없는 경우 (아직 반영되지 않은 헤더)
 
-    def process_markup_for_preview(self, text):
+        # 접힌 섹션 안의 헤더는 미리보기에 마크가 없으므로 편집기만 이동
+        try:
+            self.preview_text.see(f"preview_hdr_{self.header_index.position(header_id)}")
+        except tk.TclError:
+            pass
+
+    def process_markup_for_preview(self, text, collapsed_positions=None):
         temp_footnotes = {}
         temp_fn_counter = 0
 
@@ -144,6 +556,8 @@ class MarkupEditor:
         
         offset = 0
         processed_text_parts = []
+        processed_length = 0
+        footnote_map = SourceMap() # 각주 변환 결과 <- 원본 텍스트
         
         for match in re.finditer(fn_pattern, text, flags=re.DOTALL | re.IGNORECASE):
             temp_fn_counter += 1
@@ -152,35 +566,78 @@ class MarkupEditor:
             # 각주 내용 추출 (inner_content)
             inner_content = match.group(1).strip()
             # 각주 유형도 함께 저장 (display_type 결정에 사용될 수 있음)
-            fn_type = match.group(2) if match.group(2) else "normal" # Default to "normal" if type not specified
+            fn_type = "normal" # 현재는 normal 유형만 지원
             temp_footnotes[fn_number] = (inner_content, fn_type)
 
             # 현재 매치 이전의 텍스트 추가
             processed_text_parts.append(text[offset:match.start()])
+            footnote_map.add(processed_length, offset, match.start() - offset)
+            processed_length += match.start() - offset
             # [N] 형태로 변환하여 추가
-            processed_text_parts.append(f"[{fn_number}]")
+            fn_reference = f"[{fn_number}]"
+            processed_text_parts.append(fn_reference)
+            processed_length += len(fn_reference)
             
             offset = match.end()
             
         processed_text_parts.append(text[offset:])
+        footnote_map.add(processed_length, offset, len(text) - offset)
         text_with_footnotes_replaced = "".join(processed_text_parts)
 
         # 헤더 처리 (H1-H6)
-        # 줄의 시작에 #이 있거나, 이전 줄이 빈 줄이고 현재 줄이 #으로 시작하는 경우를 포함
-        header_pattern = r'^(#+)(?!#)(.*)$'
-        def replace_header(match):
-            hashes = match.group(1)
-            content = match.group(2).strip()
-            level = min(len(hashes), 6) # H1에서 H6까지만 지원
+        # 접힌 섹션은 헤더부터 같은 레벨 이하의 다음 헤더 전까지를 제외하고 헤더 줄만 남김
+        # (각주 번호는 문서 전체 기준으로 이미 매겨졌으므로 유지됨)
+        # 미리보기에 렌더링되는 헤더마다 문서 내 헤더 순번을 기록 (개요 패널 이동용 마크에 사용)
+        self.preview_header_positions = []
+        collapsed_positions = collapsed_positions or set()
+        offset = 0
+        processed_text_parts = []
+        processed_length = 0
+        header_map = SourceMap() # 헤더 변환 결과 <- 각주 변환 결과
+        hidden_level = None # 현재 숨기고 있는 섹션의 헤더 레벨
+
+        def emit(part, source=None):
+            nonlocal processed_length
+            processed_text_parts.append(part)
+            if source is not None:
+                header_map.add(processed_length, source, len(part))
+            processed_length += len(part)
+
+        # 헤더 순번은 개요 패널(HeaderIndex)과 같도록 원본 텍스트 기준으로 매김
+        # (여러 줄짜리 <fn> 안의 헤더 줄은 각주 변환 후 사라지지만 순번에는 포함됨)
+        raw_header_starts = [match.start() for match in HEADER_LINE_PATTERN.finditer(text)]
+        for match in HEADER_LINE_PATTERN.finditer(text_with_footnotes_replaced):
+            header_position = bisect.bisect_left(raw_header_starts, footnote_map.to_source(match.start()))
+            level, content = header_level_and_title(match)
+            if hidden_level is not None:
+                if level > hidden_level:
+                    continue # 접힌 섹션 내부의 하위 헤더
+                hidden_level = None
+            else:
+                emit(text_with_footnotes_replaced[offset:match.start()], offset)
+            self.preview_header_positions.append(header_position)
+
             # HTML 태그 대신 임시 PGML_HEADER 태그 사용
-            return f"<HEADER_H{level}>{content}</HEADER_H{level}>"
+            content_group = 2 if match.group(1) else 4
+            raw_content = match.group(content_group)
+            content_start = match.start(content_group) + len(raw_content) - len(raw_content.lstrip())
+            emit(f"<HEADER_H{level}>")
+            emit(content, content_start)
+            emit(f"</HEADER_H{level}>")
+            offset = match.end()
 
-        processed_text_with_headers = re.sub(
-            header_pattern, replace_header, text_with_footnotes_replaced, flags=re.MULTILINE
-        )
+            if header_position in collapsed_positions:
+                hidden_level = level
+                emit("\n⋯\n") # 접힌 섹션 표시
+
+        if hidden_level is None:
+            emit(text_with_footnotes_replaced[offset:], offset)
+        processed_text_with_headers = "".join(processed_text_parts)
 
         # 각주 내용을 전역으로 접근 가능하게 저장 (미리보기에서 렌더링되지 않으므로 필요)
         self.preview_footnotes_data = temp_footnotes # 각주 번호와 (내용, 유형)을 저장
+        # 임시 태그 텍스트 -> 편집기 원본 오프셋 대응표 (미리보기 렌더링 시 최종 대응표로 합성됨)
+        self.preview_markup_map = header_map.compose(footnote_map)
 
         return processed_text_with_headers
 
@@ -190,119 +647,94 @@ class MarkupEditor:
         self.preview_text.tag_remove("all", "1.0", tk.END)
         self.preview_text.delete("1.0", tk.END) # 모든 텍스트 삭제
 
+        # 이전 렌더링의 헤더 마크 제거
+        for mark_name in self.preview_header_marks:
+            self.preview_text.mark_unset(mark_name)
+        self.preview_header_marks = []
+        header_positions = iter(getattr(self, 'preview_header_positions', []))
+
         active_tags_set = set() # 현재 활성화된 스타일 태그를 저장하는 집합
         current_pos = 0
 
-        # PGML 스타일 태그 (C, HL 포함), 각주 번호, 헤더 태그
-        # 그룹 1: 열린 태그 (<B>, <I>, <C(...)>, <HL> 등)
-        # 그룹 3: 범용 닫는 태그 (</TC>)
-        # 그룹 4: 각주 번호 ([N])
-        # 그룹 5: 헤더 시작 (<HEADER_Hn>)
-        # 그룹 6: 헤더 끝 (</HEADER_Hn>)
-        style_regex = re.compile(
-            r'(<(?:B|굵게|I|기울임|UL|밑줄|CL|가운뎃줄|HL|C(?:\s*=\s*\w+|=?\s*#?[\da-f]{3,6}|(?:\(\s*(?:\d{1,3}|)\s*,\s*(?:\d{1,3}|)\s*,\s*(?:\d{1,3}|)\s*(?:,\s*(?:\d{1,3}|)\s*)?\)))\s*)+>)' # 그룹 1: 열린 태그 (내부 태그명은 그룹 2)
-            r'|(</TC>)' # 그룹 2: 범용 닫는 태그
-            r'|(\[\d+\])' # 그룹 3: 각주 번호 [N]
-            r'|(<HEADER_H[1-6]>)' # 그룹 4: 헤더 시작 (임시 태그)
-            r'|(</HEADER_H[1-6]>)' # 그룹 5: 헤더 끝 (임시 태그)
-            , re.DOTALL | re.IGNORECASE
-        )
-
-        # C, HL 태그 내 속성을 파싱하기 위한 정규식 (이전과 동일)
-        attribute_regex = re.compile(
-            r'(B|굵게)|(I|기울임)|(UL|밑줄)|(CL|가운뎃줄)|(HL)' # 그룹 1-5: B, I, UL, CL, HL
-            r'|(C)\s*' # 그룹 6: C
-            r'(?:=\s*(\w+)' # 그룹 7: 색상명 (예: =red)
-            r'|(?:\(\s*#?([\da-f]{3,6})\s*\))' # 그룹 8: 16진수 HEX (예: (#FF0000))
-            r'|(?:\(\s*(\d{1,3}|)\s*,\s*(\d{1,3}|)\s*,\s*(\d{1,3}|)\s*(?:,\s*(?:\d{1,3}|)\s*)?\))' # 그룹 9-12: CMYK (C,M,Y,K) (0값 생략 가능)
-            r'|(?:\(\s*(\d{1,3}|)\s*,\s*(\d{1,3}|)\s*,\s*(\d{1,3}|)\s*\)))' # 그룹 13-15: RGB (R,G,B) (0값 생략 가능)
-            , re.IGNORECASE
+        # 미리보기용 임시 표식 (각주 번호, 헤더 태그)
+        # 그룹 1: 각주 번호 ([N])
+        # 그룹 2: 헤더 시작 (<HEADER_Hn>)
+        # 그룹 3: 헤더 끝 (</HEADER_Hn>)
+        # 표식 사이의 본문에 있는 스팬 태그는 진단과 같은 tokenize_pgml 토큰으로 해석
+        # (진단에서 문제가 없는 태그는 미리보기에서도 서식으로 적용됨)
+        preview_marker_regex = re.compile(
+            r'(\[\d+\])' # 그룹 1: 각주 번호 [N]
+            r'|(<HEADER_H[1-6]>)' # 그룹 2: 헤더 시작 (임시 태그)
+            r'|(</HEADER_H[1-6]>)' # 그룹 3: 헤더 끝 (임시 태그)
         )
+        # 스팬 속성 이름 -> 미리보기 태그 (색상은 color_RRGGBB 태그)
+        span_preview_tags = {"B": "bold", "I": "italic", "UL": "underline", "CL": "strikethrough", "HL": "highlight"}
 
         self.preview_text.config(state=tk.NORMAL) # 텍스트 삽입을 위해 임시 활성화
 
-        for match in style_regex.finditer(text_content):
-            if match.start() > current_pos:
-                # 현재 매치 이전의 텍스트 삽입
-                text_segment = text_content[current_pos:match.start()]
-                self.preview_text.insert(tk.END, text_segment, tuple(active_tags_set))
-
-            # 열린 태그 처리 (그룹 1)
-            if match.group(1): 
-                inner_tag_content = match.group(1).strip('<> ') # 예: "B I", "C=red"
-                
-                # 중첩된 여러 태그 처리 (예: <B I>)
-                for attr_match in attribute_regex.finditer(inner_tag_content):
-                    if attr_match.group(1): # B or 굵게
-                        active_tags_set.add("bold")
-                    elif attr_match.group(2): # I or 기울임
-                        active_tags_set.add("italic")
-                    elif attr_match.group(3): # UL or 밑줄
-                        active_tags_set.add("underline")
-                    elif attr_match.group(4): # CL or 가운뎃줄
-                        active_tags_set.add("strikethrough")
-                    elif attr_match.group(5): # HL
-                        active_tags_set.add("highlight")
-                    elif attr_match.group(6): # C (색상)
-                        color_name_or_hex = attr_match.group(7) # 색상명 (예: =red)
-                        hex_value = attr_match.group(8) # HEX 값 (예: (#FF0000))
-                        # CMYK 또는 RGB 값 처리 (그룹 9-12)
-                        cmyk_or_rgb_values = tuple(filter(None, attr_match.groups()[8:])) # 모든 가능한 숫자 그룹
-
-                        color_tag = None
-                        color_hex = None
-
-                        if color_name_or_hex:
-                            color_rgb = self.PREDEFINED_COLORS.get(color_name_or_hex.lower())
-                            if color_rgb:
-                                color_hex = f"#{color_rgb[0]:02x}{color_rgb[1]:02x}{color_rgb[2]:02x}"
-                        elif hex_value:
-                            if len(hex_value) == 3:
-                                hex_value = ''.join([c*2 for c in hex_value])
-                            color_hex = f"#{hex_value}"
-                        elif cmyk_or_rgb_values:
-                            try:
-                                parsed_values = []
-                                for v in cmyk_or_rgb_values:
-                                    try:
-                                        parsed_values.append(int(v))
-                                    except ValueError:
-                                        # Invalid literal for int, default to 0
-                                        parsed_values.append(0) 
-                                
-                                if len(parsed_values) == 4: # CMYK (C, M, Y, K)
-                                    c, m, y, k = parsed_values
-                                    # CMYK를 RGB로 변환 (ReportLab은 CMYK 직접 지원 안함, Tkinter도 마찬가지)
-                                    r = int(255 * (1 - c/100) * (1 - k/100))
-                                    g = int(255 * (1 - m/100) * (1 - k/100))
-                                    b = int(255 * (1 - y/100) * (1 - k/100))
-                                    color_hex = f"#{r:02x}{g:02x}{b:02x}"
-                                elif len(parsed_values) == 3: # RGB (R, G, B)
-                                    r, g, b = parsed_values
-                                    color_hex = f"#{r:02x}{g:02x}{b:02x}"
-                            except Exception: # Catch any other potential errors during parsing
-                                pass # Silently fail color parsing if format is totally off
-                        
+        # 삽입한 텍스트가 임시 태그 텍스트의 어느 위치에서 왔는지 기록 (편집기 <-> 미리보기 위치 대응용)
+        render_map = SourceMap() # 미리보기 텍스트 <- 임시 태그 텍스트
+        preview_parts = []
+        preview_length = 0
+        def insert_preview(segment, tags=(), source=None):
+            nonlocal preview_length
+            self.preview_text.insert(tk.END, segment, tags)
+            if source is not None:
+                render_map.add(preview_length, source, len(segment))
+            preview_parts.append(segment)
+            preview_length += len(segment)
+
+        def insert_styled_text(segment_start, segment_end):
+            # 본문 구간을 토큰으로 나누어 스팬 태그는 서식 상태에 반영하고, 나머지는 현재 서식으로 삽입
+            pending_start = segment_start # 아직 삽입하지 않은 본문의 시작 위치
+            token_start = segment_start
+            for kind, token in tokenize_pgml(text_content[segment_start:segment_end]):
+                token_end = token_start + len(token)
+                if kind in ("open", "close", "close_all", "escape"):
+                    if token_start > pending_start:
+                        insert_preview(text_content[pending_start:token_start], tuple(active_tags_set), pending_start)
+                    pending_start = token_end
+
+                if kind == "open":
+                    # 중첩된 여러 속성 처리 (예: <B I>, <B, C=red>)
+                    for attribute_name, attribute in span_tag_attributes(token):
+                        if attribute_name != "C":
+                            active_tags_set.add(span_preview_tags[attribute_name])
+                            continue
+                        # 잘못된 색상 값은 진단에서 표시하고 미리보기에서는 적용하지 않음
+                        color_hex = color_attribute_to_hex(attribute)
                         if color_hex:
                             color_tag = f"color_{color_hex.upper()}" # 태그 이름은 대문자로 통일
                             self.preview_text.tag_config(color_tag, foreground=color_hex)
+                            active_tags_set.difference_update([tag for tag in active_tags_set if tag.startswith("color_")])
                             active_tags_set.add(color_tag)
+                elif kind == "close":
+                    # 개별 닫는 태그는 해당 속성만 제거 (예: </B>)
+                    attribute_name = span_close_attribute(token)
+                    if attribute_name == "C":
+                        active_tags_set.difference_update([tag for tag in active_tags_set if tag.startswith("color_")])
+                    else:
+                        active_tags_set.discard(span_preview_tags[attribute_name])
+                elif kind == "close_all":
+                    # 범용 닫는 태그는 모든 글꼴/하이라이트/가운뎃줄/색상 태그 제거
+                    active_tags_set.clear()
+                elif kind == "escape":
+                    pending_start = token_start + 1 # 이스케이프 문자(`)는 표시하지 않고 다음 글자만 본문으로 삽입
+                token_start = token_end
+            if segment_end > pending_start:
+                insert_preview(text_content[pending_start:segment_end], tuple(active_tags_set), pending_start)
+
+        for match in preview_marker_regex.finditer(text_content):
+            if match.start() < current_pos:
+                continue # 이미 통째로 삽입한 헤더 내부의 각주 번호 (위치 대응표가 뒤로 돌아가지 않도록 건너뜀)
+            if match.start() > current_pos:
+                # 현재 매치 이전의 본문 삽입
+                insert_styled_text(current_pos, match.start())
 
-            # 범용 닫는 태그 처리 (그룹 2)
-            elif match.group(2): 
-                # 모든 일반적인 글꼴/하이라이트/가운뎃줄/색상 태그 제거
-                all_span_tags = {"bold", "italic", "underline", "strikethrough", "highlight"}
-                active_tags_set.difference_update(all_span_tags)
-
-                # 모든 색상 태그 제거
-                current_color_tags = [tag for tag in active_tags_set if tag.startswith("color_")]
-                for tag in current_color_tags:
-                    active_tags_set.discard(tag)
-
-            elif match.group(3): # 각주 번호 [N]
+            if match.group(1): # 각주 번호 [N]
                 try:
-                    footnote_number = int(match.group(3).strip('[]'))
-                    footnote_text_display = match.group(3)
+                    footnote_number = int(match.group(1).strip('[]'))
+                    footnote_text_display = match.group(1)
 
                     if footnote_number in self.preview_footnotes_data:
                         footnote_content, footnote_type = self.preview_footnotes_data[footnote_number]
@@ -312,7 +744,7 @@ class MarkupEditor:
                         self.preview_text.tag_config(link_tag, foreground="blue", underline=True)
                         
                         # 삽입
-                        self.preview_text.insert(tk.END, footnote_text_display, (link_tag,))
+                        insert_preview(footnote_text_display, (link_tag,), match.start())
                         
                         # 클릭 이벤트 바인딩
                         self.preview_text.tag_bind(link_tag, "<Button-1>", lambda e, num=footnote_number: self.scroll_to_preview_fn_location(num))
@@ -320,45 +752,54 @@ class MarkupEditor:
                         self.preview_text.tag_bind(link_tag, "<Leave>", lambda e: self.preview_text.config(cursor="arrow"))
                     else:
                         # 데이터에 없는 각주 번호는 일반 텍스트로
-                        self.preview_text.insert(tk.END, footnote_text_display)
+                        insert_preview(footnote_text_display, source=match.start())
                 except ValueError:
                     # If footnote number is invalid, insert as plain text without special formatting
-                    self.preview_text.insert(tk.END, match.group(3))
+                    insert_preview(match.group(1), source=match.start())
                 current_pos = match.end()
                 continue # 각주 번호는 텍스트로 삽입되었으므로 다음 루프 진행
 
-            elif match.group(4): # 헤더 시작 <HEADER_Hn>
+            elif match.group(2): # 헤더 시작 <HEADER_Hn>
                 try:
-                    header_level = int(match.group(4)[len('<HEADER_H'):-1]) # 예: <HEADER_H1> -> 1
+                    header_level = int(match.group(2)[len('<HEADER_H'):-1]) # 예: <HEADER_H1> -> 1
                     end_of_header_tag = f"</HEADER_H{header_level}>"
                     end_of_header_tag_match = text_content.find(end_of_header_tag, match.end())
 
                     if end_of_header_tag_match != -1:
-                        header_text = text_content[match.end():end_of_header_tag_match].strip()
+                        raw_header_text = text_content[match.end():end_of_header_tag_match]
+                        header_text = raw_header_text.strip()
+                        header_text_start = match.end() + len(raw_header_text) - len(raw_header_text.lstrip())
                         header_tag = f"header_h{header_level}"
-                        self.preview_text.insert(tk.END, header_text + "\n", (header_tag,)) # 헤더 뒤에 개행 추가
+                        # 개요 패널에서 이동할 수 있도록 헤더 위치에 마크 설정
+                        header_position = next(header_positions, None)
+                        if header_position is not None:
+                            mark_name = f"preview_hdr_{header_position}"
+                            self.preview_text.mark_set(mark_name, "end-1c")
+                            self.preview_text.mark_gravity(mark_name, tk.LEFT)
+                            self.preview_header_marks.append(mark_name)
+                        insert_preview(header_text, (header_tag,), header_text_start)
+                        insert_preview("\n", (header_tag,)) # 헤더 뒤에 개행 추가
                         current_pos = end_of_header_tag_match + len(end_of_header_tag)
                         continue # 헤더는 전체를 처리했으므로 다음 루프 진행
                     else: # Mismatched header tag (should not happen with internal tags)
-                        self.preview_text.insert(tk.END, match.group(4)) # Insert tag as plain text
+                        insert_preview(match.group(2)) # Insert tag as plain text
                         current_pos = match.end()
                         continue
                 except ValueError:
                     # If header level is invalid, insert as plain text without special formatting
-                    self.preview_text.insert(tk.END, match.group(4))
+                    insert_preview(match.group(2))
                     current_pos = match.end()
                     continue
 
             current_pos = match.end()
 
-        # 마지막 텍스트 세그먼트 처리
+        # 마지막 본문 구간 처리
         if current_pos < len(text_content):
-            text_segment = text_content[current_pos:]
-            self.preview_text.insert(tk.END, text_segment, tuple(active_tags_set))
+            insert_styled_text(current_pos, len(text_content))
 
         # 각주 목록 표시
         if hasattr(self, 'preview_footnotes_data') and self.preview_footnotes_data:
-            self.preview_text.insert(tk.END, "\n\n---\n각주 목록:\n", "separator")
+            insert_preview("\n\n---\n각주 목록:\n", "separator")
             
             # 각주 번호 순서대로 정렬
             sorted_footnotes_items = sorted(self.preview_footnotes_data.items())
@@ -367,11 +808,15 @@ class MarkupEditor:
                 footnote_list_text = f"[{fn_num}] {fn_content}\n"
                 
                 # 각주 목록 항목도 링크로 만들 수 있음 (선택 사항)
-                self.preview_text.insert(tk.END, footnote_list_text, "footnote_list_item") # 일반 텍스트로 삽입
+                insert_preview(footnote_list_text, "footnote_list_item") # 일반 텍스트로 삽입
                 # 각주 목록 항목 자체는 링크가 필요 없으므로 단순 삽입
 
         self.preview_text.config(state=tk.DISABLED) # 미리보기 편집 불가로 재설정
 
+        # 편집기 원본 오프셋 <-> 미리보기 오프셋 대응표
+        self.preview_source_map = render_map.compose(getattr(self, 'preview_markup_map', SourceMap()))
+        self.preview_line_starts = line_start_offsets("".join(preview_parts))
+
     def tag_config_setup(self):
         # 기본 폰트 객체는 __init__에서 생성됨
         
@@ -386,6 +831,9 @@ class MarkupEditor:
         # 형광펜 (배경색으로 구현)
         self.preview_text.tag_config("highlight", background="yellow")
 
+        # 편집기 진단 밑줄
+        self.text_editor.tag_config("diagnostic", underline=True, background="#ffe0e0")
+
         # 헤더 스타일
         self.preview_text.tag_config("header_h1", font=(self.base_font_family, 24, "bold"), spacing3=10) # spacing3은 단락 뒤 간격
         self.preview_text.tag_config("header_h2", font=(self.base_font_family, 20, "bold"), spacing3=8)
@@ -427,18 +875,13 @@ class MarkupEditor:
         text_with_footnotes_replaced = "".join(processed_text_parts)
 
         # 헤더 처리 (H1-H6)
-        # 단일 '#'으로 시작하는 줄을 헤더로 처리
-        header_pattern = r'^(#+)(?!#)(.*)$'
+        # '#' 또는 <Hn>으로 시작하는 줄을 헤더로 처리
         def replace_header_for_pdf(match):
-            hashes = match.group(1)
-            content = match.group(2).strip()
-            level = min(len(hashes), 6) # H1에서 H6까지만 지원
+            level, content = header_level_and_title(match)
             # HTML 태그로 변환
             return f"<h{level}>{content}</h{level}>"
 
-        processed_text_with_headers = re.sub(
-            header_pattern, replace_header_for_pdf, text_with_footnotes_replaced, flags=re.MULTILINE
-        )
+        processed_text_with_headers = HEADER_LINE_PATTERN.sub(replace_header_for_pdf, text_with_footnotes_replaced)
 
         self.footnotes_for_pdf_export = temp_footnotes_for_pdf # PDF 내보내기를 위한 각주 저장
 
@@ -461,53 +904,15 @@ class MarkupEditor:
             r'<C(?:\s*=\s*(\w+))?' # 그룹 1: 색상명 (예: =red)
             r'(?:\s*=\s*#?([\da-f]{3,6}))?' # 그룹 2: 16진수 HEX (예: =#FF0000 또는 =FFF)
             r'(?:\(\s*#?([\da-f]{3,6})\s*\))?' # 그룹 3: 16진수 HEX (예: (#FF0000) 또는 (FFF))
-            r'(?:\(\s*(\d{1,3}|)\s*,\s*(\d{1,3}|)\s*,\s*(\d{1,3}|)\s*(?:,\s*(?:\d{1,3}|)\s*)?\))?' # 그룹 4-7: CMYK (C,M,Y,K) 또는 RGB (R,G,B)
+            r'(?:\(\s*(\d{1,3}|)\s*,\s*(\d{1,3}|)\s*,\s*(\d{1,3}|)\s*(?:,\s*(\d{1,3}|)\s*)?\))?' # 그룹 4-7: CMYK (C,M,Y,K) 또는 RGB (R,G,B)
             r'>', re.IGNORECASE
         )
 
         def replace_color_tag(match):
             color_name = match.group(1)
-            hex_value1 = match.group(2)
-            hex_value2 = match.group(3)
-            cmyk_or_rgb_values = tuple(filter(None, match.groups()[3:])) # CMYK 또는 RGB 값 튜플
-
-            color_code = None
-
-            if color_name:
-                # 사전 정의된 색상명 처리
-                rgb = self.PREDEFINED_COLORS.get(color_name.lower())
-                if rgb:
-                    color_code = f"#{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}"
-            elif hex_value1 or hex_value2:
-                # 16진수 HEX 처리
-                hex_val = hex_value1 if hex_value1 else hex_value2
-                if len(hex_val) == 3: # 3자리 HEX를 6자리로 확장
-                    hex_val = ''.join([c*2 for c in hex_val])
-                color_code = f"#{hex_val}"
-            elif cmyk_or_rgb_values:
-                # CMYK 또는 RGB 처리
-                try:
-                    parsed_values = []
-                    for v in cmyk_or_rgb_values:
-                        try:
-                            parsed_values.append(int(v))
-                        except ValueError:
-                            # Invalid literal for int, default to 0
-                            parsed_values.append(0) 
-                    
-                    if len(parsed_values) == 4: # CMYK
-                        c, m, y, k = parsed_values
-                        # CMYK를 RGB로 변환 (ReportLab은 CMYK 직접 지원 안함)
-                        # 간단한 근사치 변환
-                        r = int(255 * (1 - c/100) * (1 - k/100))
-                        g = int(255 * (1 - m/100) * (1 - k/100))
-                        b = int(255 * (1 - y/100) * (1 - k/100))
-                        color_code = f"#{r:02x}{g:02x}{b:02x}"
-                    elif len(parsed_values) == 3: # RGB
-                        r, g, b = parsed_values
-                        color_code = f"#{r:02x}{g:02x}{b:02x}"
-                except Exception:
-                    pass # 잘못된 숫자 형식 무시
+            hex_value = match.group(2) or match.group(3)
+            cmyk_or_rgb_values = [v for v in match.groups()[3:] if v is not None] # CMYK 또는 RGB 값
+            color_code = pgml_color_to_hex(color_name, hex_value, cmyk_or_rgb_values)
 
             if color_code:
                 return f'<font color="{color_code}">'.lower() # 소문자로 변환
@@ -542,6 +947,11 @@ class MarkupEditor:
         story = []
         raw_text = self.text_editor.get("1.0", tk.END)
 
+        # 진단된 문제가 있으면 PDF 변환 중 오류가 날 수 있으므로 먼저 확인
+        diagnostics = self.diagnostics_engine.run(raw_text)
+        if diagnostics and not messagebox.askyesno("PDF 내보내기", f"문서에 문제가 {len(diagnostics)}개 있습니다. PDF 변환 중 오류가 발생하거나 서식이 빠질 수 있습니다.\n계속하시겠습니까?"):
+            return
+
         # PDF 내보내기용으로 마크업 처리 (헤더, 각주 등)
         processed_text_for_pdf = self.process_markup_for_pdf_export(raw_text)
 
@@ -610,6 +1020,7 @@ class MarkupEditor:
             if messagebox.askyesno("저장", "변경 사항을 저장하시겠습니까?"):
                 self.save_document()
         self.text_editor.delete("1.0", tk.END)
+        self.reset_outline()
         self.current_file_path = None
         self.modified = False
         self.root.title("필기용 마크업 에디터 - 제목 없음")
@@ -628,12 +1039,11 @@ class MarkupEditor:
                 with open(file_path, "r", encoding="utf-8") as file:
                     loaded_content = file.read()
                 
-                # '--- 각주 목록:'을 기준으로 본문과 각주 섹션을 분리
-                parts = re.split(r'(---\s*각주 목록:\s*)', loaded_content, flags=re.IGNORECASE, maxsplit=1)
-                main_body = parts[0].strip() # 본문 내용 (원래 <fn> 태그 포함)
+                main_body = self.strip_footnote_section(loaded_content) # 본문 내용 (원래 <fn> 태그 포함)
 
                 self.text_editor.delete("1.0", tk.END)
                 self.text_editor.insert("1.0", main_body)
+                self.reset_outline() # 이전 문서의 헤더 id와 접힘 상태를 넘겨받지 않도록 개요를 새로 구성
                 self.current_file_path = file_path
                 self.modified = False
                 self.root.title(f"필기용 마크업 에디터 - {os.path.basename(file_path)}")
@@ -672,7 +1082,14 @@ class MarkupEditor:
         except Exception as e:
             messagebox.showerror("저장 오류", f"문서 저장 중 오류가 발생했습니다: {e}")
 
-    def process_markup_for_save(self, text):
+    @staticmethod
+    def strip_footnote_section(content):
+        # '--- 각주 목록:'을 기준으로 본문과 각주 섹션을 분리하여 본문만 반환
+        parts = re.split(r'(---\s*각주 목록:\s*)', content, flags=re.IGNORECASE, maxsplit=1)
+        return parts[0].strip()
+
+    @staticmethod
+    def process_markup_for_save(text):
         temp_footnotes_for_save = {}
         fn_pattern = re.compile(r'<fn(?:\s+type\((?:normal)\))?>(.*?)</fn>', re.DOTALL | re.IGNORECASE)
         fn_counter = 0
@@ -694,6 +1111,37 @@ class MarkupEditor:
         
         return final_content_to_save
 
+    def find_and_replace(self):
+        find_text = simpledialog.askstring("찾아 바꾸기", "찾을 내용:", parent=self.root)
+        if not find_text:
+            return
+        replace_text = simpledialog.askstring("찾아 바꾸기", "바꿀 내용:", parent=self.root)
+        if replace_text is None:
+            return
+        self.apply_bulk_transform(build_bulk_transform(replacements=[(find_text, replace_text)]))
+
+    def apply_bulk_transform(self, transform):
+        original_text = self.text_editor.get("1.0", "end-1c")
+        transformed_text = transform.apply(original_text)
+        if transformed_text == original_text:
+            messagebox.showinfo("일괄 변환", "변경할 내용이 없습니다.")
+            return
+
+        # 한 번의 삭제/삽입으로 편집기에 반영 (커서 위치는 유지)
+        cursor_index = self.text_editor.index(tk.INSERT)
+        self.text_editor.delete("1.0", tk.END)
+        self.text_editor.insert("1.0", transformed_text)
+        self.text_editor.mark_set(tk.INSERT, cursor_index)
+        self.text_editor.see(tk.INSERT)
+        self.update_preview()
+        self.reset_outline_marks()
+
+    def reset_outline_marks(self):
+        # 편집기 내용 전체를 지우고 다시 넣으면 개요 마크가 모두 1.0으로 모이므로,
+        # 헤더 구성이 그대로라 update_outline이 마크를 건드리지 않은 경우에도 인덱스 기준으로 다시 설정
+        for line_number, (header_id, level, title) in zip(self.header_index.header_lines, self.header_index.entries):
+            self.text_editor.mark_set(f"outline_hdr_{header_id}", f"{line_number + 1}.0")
+
     def scroll_to_preview_fn_location(self, fn_number):
         # 각주 본문 [N] 클릭 시 미리보기에서 해당 각주 목록으로 이동
         # 이 함수는 현재 Preview 텍스트 위젯에 실제 각주 목록이 있을 때 작동합니다.
@@ -721,8 +1169,373 @@ class MarkupEditor:
             self.root.after(1000, lambda: self.preview_text.tag_remove("highlight_fn", "1.0", tk.END))
 
 
+# PGML 토큰 패턴 (일괄 변환용)
+# 스팬 속성: 글꼴/형광펜 태그 또는 색상 (C=이름, C=#HEX, C(...), CHEX, C)
+SPAN_ATTRIBUTE_PATTERN = r'(?:B|굵게|I|기울임|UL|밑줄|CL|가운뎃줄|HL|C\s*=\s*#?\w*|C\s*\([^()<>]*\)|C#?[\da-f]{3,6}|C)'
+PGML_TOKEN_PATTERN = re.compile(
+    r'(`.)' # 그룹 1: 이스케이프 (` 다음 한 글자는 그대로 유지)
+    r'|(\n)' # 그룹 2: 줄바꿈
+    r'|(^(?:#+|<H[1-6]>))' # 그룹 3: 헤더 시작 (줄 맨 앞)
+    r'|(</H>)' # 그룹 4: 헤더 끝
+    r'|(<fn(?:\s+type\((?:normal)\))?>)' # 그룹 5: 각주 시작
+    r'|(</fn>)' # 그룹 6: 각주 끝
+    r'|(</TC>)' # 그룹 7: 범용 닫는 태그
+    r'|(</(?:B|굵게|I|기울임|UL|밑줄|CL|가운뎃줄|HL|C)>)' # 그룹 8: 개별 닫는 태그
+    rf'|(<\s*{SPAN_ATTRIBUTE_PATTERN}(?:[\s,]+{SPAN_ATTRIBUTE_PATTERN})*\s*>)' # 그룹 9: 스팬 여는 태그
+    , re.DOTALL | re.IGNORECASE | re.MULTILINE
+)
+# 그룹 번호 -> 토큰 종류 (태그가 아닌 나머지는 "text")
+PGML_TOKEN_KINDS = (None, "escape", "newline", "header", "header_close", "fn_open", "fn_close", "close_all", "close", "open")
+# 스팬 속성의 한글 별칭 -> 영문 이름
+SPAN_ATTRIBUTE_ALIASES = {"굵게": "B", "기울임": "I", "밑줄": "UL", "가운뎃줄": "CL"}
+
+def tokenize_pgml(text):
+    # 문서를 (토큰 종류, 토큰 텍스트)로 분해. 모든 토큰을 이어 붙이면 원문과 같음
+    offset = 0
+    for match in PGML_TOKEN_PATTERN.finditer(text):
+        if match.start() > offset:
+            yield "text", text[offset:match.start()]
+        yield PGML_TOKEN_KINDS[match.lastindex], match.group()
+        offset = match.end()
+    if offset < len(text):
+        yield "text", text[offset:]
+
+
+def span_tag_attributes(token):
+    # 스팬 여는 태그 토큰의 속성을 (속성 이름, 속성 텍스트)로 분해 (속성 이름은 영문, 색상은 "C")
+    for attribute_match in re.finditer(SPAN_ATTRIBUTE_PATTERN, token.strip("<> "), re.IGNORECASE):
+        attribute = attribute_match.group()
+        if attribute[0] in "Cc" and attribute.upper() != "CL":
+            yield "C", attribute
+        else:
+            yield SPAN_ATTRIBUTE_ALIASES.get(attribute, attribute.upper()), attribute
+
+def span_close_attribute(token):
+    # 개별 닫는 태그 토큰이 닫는 속성 이름 (예: </굵게> -> B)
+    attribute = token[2:-1]
+    return SPAN_ATTRIBUTE_ALIASES.get(attribute, attribute.upper())
+
+
+class PGMLTransform:
+    # 여러 재작성 규칙을 문서 토큰에 한 번의 순회로 적용하는 일괄 변환기
+    # 규칙은 토큰 종류별로 등록하는 (토큰 텍스트, 상태 dict) -> 새 토큰 텍스트 함수이며,
+    # 상태 dict는 한 번의 apply 동안 모든 규칙이 공유합니다. 문서 끝에서는 "end" 규칙이 빈 토큰으로 호출됩니다.
+    # 토큰의 순서는 바뀌지 않으므로 이스케이프와 각주 순서는 그대로 유지됩니다.
+    def __init__(self):
+        self.rules = {}
+
+    def add_rule(self, kind, rule):
+        self.rules.setdefault(kind, []).append(rule)
+        return self
+
+    def apply(self, text):
+        state = {}
+        rules = self.rules
+        parts = []
+        for kind, token in tokenize_pgml(text):
+            for rule in rules.get(kind, ()):
+                token = rule(token, state)
+            parts.append(token)
+        end_token = ""
+        for rule in rules.get("end", ()):
+            end_token = rule(end_token, state)
+        parts.append(end_token)
+        return "".join(parts)
+
+
+COLOR_NAME_ATTRIBUTE_PATTERN = re.compile(r'(C\s*=\s*)([a-z]\w*)', re.IGNORECASE)
+
+def color_names_to_hex(token, state):
+    # 스팬 여는 태그의 사전 정의 색상명을 HEX 값으로 변환 (예: <C=red> -> <C=#FF0000>)
+    def replace_color_name(match):
+        rgb = MarkupEditor.PREDEFINED_COLORS.get(match.group(2).lower())
+        if not rgb:
+            return match.group() # 알 수 없는 색상명은 그대로 둠
+        return f"{match.group(1)}#{rgb[0]:02X}{rgb[1]:02X}{rgb[2]:02X}"
+    return COLOR_NAME_ATTRIBUTE_PATTERN.sub(replace_color_name, token)
+
+def hash_header_to_tag(token, state):
+    # '#' 헤더 시작을 <Hn>으로 변환하고, 줄 끝에서 </H>로 닫도록 표시
+    if not token.startswith("#"):
+        return token
+    state["open_header_depth"] = state.get("fn_depth", 0) # 헤더가 시작된 위치의 각주 깊이
+    return f"<H{min(len(token), 6)}>" # H1에서 H6까지만 지원
+
+def close_converted_header(token, state):
+    # 헤더 줄 안에서 시작된 여러 줄짜리 <fn>의 줄바꿈에서 닫으면 </H>가 각주 내용에 들어가므로,
+    # 헤더를 시작한 곳과 같은 각주 깊이의 줄바꿈이나 문서 끝에서만 닫음
+    if state.get("open_header_depth") == state.get("fn_depth", 0):
+        del state["open_header_depth"]
+        return "</H>" + token
+    return token
+
+def enter_footnote(token, state):
+    state["fn_depth"] = state.get("fn_depth", 0) + 1
+    return token
+
+def leave_footnote(token, state):
+    # 각주 안에서 시작된 헤더가 줄바꿈 전에 각주와 함께 끝나면 </fn> 앞에서 닫음
+    token = close_converted_header("", state) + token
+    state["fn_depth"] = max(state.get("fn_depth", 0) - 1, 0)
+    return token
+
+def build_bulk_transform(colors_to_hex=False, headers_to_tags=False, replacements=()):
+    transform = PGMLTransform()
+    if colors_to_hex:
+        transform.add_rule("open", color_names_to_hex)
+    if headers_to_tags:
+        transform.add_rule("header", hash_header_to_tag)
+        transform.add_rule("fn_open", enter_footnote)
+        transform.add_rule("fn_close", leave_footnote)
+        transform.add_rule("newline", close_converted_header)
+        transform.add_rule("end", close_converted_header)
+    # 찾아 바꾸기는 태그/이스케이프가 아닌 본문 텍스트에만 적용
+    for find_text, replace_text in replacements:
+        transform.add_rule("text", lambda token, state, find_text=find_text, replace_text=replace_text: token.replace(find_text, replace_text))
+    return transform
+
+def transform_directory(directory, transform):
+    # 디렉터리 아래의 모든 PGML 파일에 일괄 변환을 적용
+    # (변경된 파일 경로 목록, 실패한 (파일 경로, 오류) 목록)을 반환하며,
+    # 변환된 파일의 각주 목록은 변환된 본문의 <fn> 순서대로 다시 생성됩니다.
+    # 모든 파일을 먼저 읽고 변환한 뒤에 기록하므로, 읽을 수 없는 파일 때문에 중간에 멈추지 않습니다.
+    failures = []
+    pending_writes = []
+    for dir_path, dir_names, file_names in os.walk(directory, onerror=lambda error: failures.append((error.filename, error))):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            if os.path.splitext(file_name)[1].lower() not in (".pml", ".pgml"):
+                continue
+            file_path = os.path.join(dir_path, file_name)
+            try:
+                with open(file_path, "r", encoding="utf-8") as file:
+                    content = file.read()
+            except (OSError, UnicodeDecodeError) as e:
+                failures.append((file_path, e))
+                continue
+            main_body = MarkupEditor.strip_footnote_section(content)
+            transformed_body = transform.apply(main_body)
+            # 본문이 바뀐 파일만 기록 (저장 형식 차이만으로 파일을 다시 쓰지 않음)
+            if transformed_body != main_body:
+                pending_writes.append((file_path, MarkupEditor.process_markup_for_save(transformed_body)))
+
+    changed_paths = []
+    for file_path, new_content in pending_writes:
+        try:
+            with open(file_path, "w", encoding="utf-8") as file:
+                file.write(new_content)
+            changed_paths.append(file_path)
+        except OSError as e:
+            failures.append((file_path, e))
+    return changed_paths, failures
+
+def run_bulk_transform(argv):
+    # 명령줄에서 GUI 없이 일괄 변환 실행
+    parser = argparse.ArgumentParser(description="PGML 문서 일괄 변환")
+    parser.add_argument("directory", help="변환할 .pml/.pgml 파일이 있는 디렉터리")
+    parser.add_argument("--colors-to-hex", action="store_true", help="색상명을 HEX 값으로 변환")
+    parser.add_argument("--headers-to-tags", action="store_true", help="# 헤더를 <Hn> 태그로 변환")
+    parser.add_argument("--replace", nargs=2, action="append", default=[], metavar=("FIND", "REPLACE"), help="본문 텍스트 찾아 바꾸기 (여러 번 지정 가능)")
+    args = parser.parse_args(argv)
+    if not (args.colors_to_hex or args.headers_to_tags or args.replace):
+        parser.error("변환 옵션을 하나 이상 지정해 주세요 (--colors-to-hex, --headers-to-tags, --replace)")
+    if not os.path.isdir(args.directory):
+        parser.error(f"디렉터리를 찾을 수 없습니다: {args.directory}")
+
+    transform = build_bulk_transform(args.colors_to_hex, args.headers_to_tags, args.replace)
+    changed_paths, failures = transform_directory(args.directory, transform)
+    for file_path in changed_paths:
+        print(f"변환됨: {file_path}")
+    for file_path, error in failures:
+        print(f"실패: {file_path}: {error}", file=sys.stderr)
+    print(f"변환된 파일 {len(changed_paths)}개, 실패한 파일 {len(failures)}개")
+    return 1 if failures else 0
+
+
+# 색상 속성 형식 (진단용)
+COLOR_NAME_VALUE_PATTERN = re.compile(r'C\s*=\s*(#?)(\w*)$', re.IGNORECASE)
+COLOR_PAREN_VALUE_PATTERN = re.compile(r'C\s*\((.*)\)$', re.IGNORECASE | re.DOTALL)
+# 색상 태그로 인식되지 못한 '<C=' 또는 '<C(' (잘못된 색상 태그)
+BROKEN_COLOR_TAG_PATTERN = re.compile(r'<\s*C\s*[=(]', re.IGNORECASE)
+# 표 데이터 (<TB> ... </TB>)와 행 ( ... )
+TABLE_PATTERN = re.compile(r'<TB>(.*?)(</TB>|$)', re.IGNORECASE | re.DOTALL)
+TABLE_ROW_PATTERN = re.compile(r'\(([^()]*)\)')
+# 블록(단락) 구분: 빈 줄
+BLOCK_SEPARATOR_PATTERN = re.compile(r'\n[ \t]*\n')
+
+def color_attribute_problem(attribute):
+    # 색상 속성의 문제를 설명하는 메시지 (문제가 없으면 None)
+    match = COLOR_NAME_VALUE_PATTERN.match(attribute)
+    if match:
+        is_hex, value = match.groups()
+        if HEX_COLOR_VALUE_PATTERN.fullmatch(value):
+            return None # HEX 값 ('#' 생략 가능, 예: C=FF0000)
+        if is_hex:
+            return f"잘못된 HEX 색상 값: {attribute}"
+        if value and value.lower() not in MarkupEditor.PREDEFINED_COLORS:
+            return f"알 수 없는 색상명: {value}"
+        return None
+
+    match = COLOR_PAREN_VALUE_PATTERN.match(attribute)
+    if match:
+        inner = match.group(1).strip()
+        if not inner:
+            return None # c()는 검정색
+        if "," not in inner:
+            if re.fullmatch(r'#?(?:[\da-f]{3}|[\da-f]{6})', inner, re.IGNORECASE):
+                return None
+            return f"잘못된 색상 형식: {attribute}"
+        values = [value.strip() for value in inner.split(",")]
+        if len(values) not in (3, 4) or not all(value.isdigit() or not value for value in values):
+            return f"잘못된 색상 형식: {attribute} (RGB는 값 3개, CMYK는 값 4개)"
+        limit = 255 if len(values) == 3 else 100
+        if any(value and int(value) > limit for value in values):
+            return f"{'RGB' if limit == 255 else 'CMYK'} 값은 0~{limit} 범위여야 합니다: {attribute}"
+        return None
+
+    # C#HEX 또는 CHEX 형식
+    value = attribute[1:].lstrip("#")
+    if value and len(value) not in (3, 6):
+        return f"잘못된 HEX 색상 값: {attribute}"
+    return None
+
+
+def color_attribute_to_hex(attribute):
+    # 스팬 태그의 색상 속성을 "#rrggbb"로 변환 (변환할 수 없으면 None)
+    # c=, c(), C는 검정색 (예: c=black, c=, c(0, 0, 0), c()는 모두 같음)
+    match = COLOR_NAME_VALUE_PATTERN.match(attribute)
+    if match:
+        is_hex, value = match.groups()
+        if not value:
+            return None if is_hex else "#000000"
+        return pgml_color_to_hex(hex_value=value) if is_hex else pgml_color_to_hex(name=value)
+
+    match = COLOR_PAREN_VALUE_PATTERN.match(attribute)
+    if match:
+        inner = match.group(1).strip()
+        if not inner:
+            return "#000000"
+        if "," not in inner:
+            return pgml_color_to_hex(hex_value=inner[1:] if inner.startswith("#") else inner)
+        values = [value.strip() for value in inner.split(",")]
+        if not all(value.isdigit() or not value for value in values):
+            return None
+        return pgml_color_to_hex(numbers=values)
+
+    # C#HEX 또는 CHEX 형식
+    value = attribute[1:].lstrip("#")
+    return pgml_color_to_hex(hex_value=value) if value else "#000000"
+
+
+class DiagnosticsEngine:
+    # 문서를 빈 줄로 구분된 블록 단위로 검사하는 진단기
+    # 스팬과 <fn>은 블록을 넘어 이어질 수 있으므로, 블록 시작 시점에 열려 있는 상태를 다음 블록으로 넘깁니다.
+    # 결과는 (블록 텍스트, 들어오는 상태)를 키로 캐시하므로, 내용과 앞 상태가 같은 블록은
+    # 위치와 상관없이 이전 결과를 그대로 재사용합니다.
+    def __init__(self):
+        self.cache = {} # (블록 텍스트, 열린 속성 이름들, <fn> 열림 여부) -> check_block 결과
+
+    def run(self, text):
+        # 문서 전체의 진단 목록 [(시작 오프셋, 끝 오프셋, 메시지)]을 시작 위치 순으로 반환
+        diagnostics = []
+        new_cache = {} # 현재 문서에 있는 블록의 결과만 남김
+        open_attributes = {} # 열린 속성 -> 그 속성을 연 태그의 문서 내 (시작, 끝)
+        fn_open_span = None # 열린 <fn> 태그의 문서 내 (시작, 끝)
+        block_start = 0
+        separators = [match.span() for match in BLOCK_SEPARATOR_PATTERN.finditer(text)]
+        separators.append((len(text), len(text)))
+        for separator_start, separator_end in separators:
+            block = text[block_start:separator_start]
+            key = (block, frozenset(open_attributes), fn_open_span is not None)
+            result = self.cache.get(key)
+            if result is None:
+                result = self.check_block(*key)
+            new_cache[key] = result
+            block_diagnostics, block_open_attributes, block_fn_open_span = result
+            for start, end, message in block_diagnostics:
+                diagnostics.append((block_start + start, block_start + end, message))
+
+            # 블록이 끝난 시점의 열린 상태 (빈 튜플은 이전 블록에서 열린 태그)
+            open_attributes = {
+                attribute: (block_start + tag_span[0], block_start + tag_span[1]) if tag_span else open_attributes[attribute]
+                for attribute, tag_span in block_open_attributes
+            }
+            if block_fn_open_span is None:
+                fn_open_span = None
+            elif block_fn_open_span:
+                fn_open_span = (block_start + block_fn_open_span[0], block_start + block_fn_open_span[1])
+            # 빈 튜플이면 이전 블록에서 연 <fn>이 계속 열려 있음
+            block_start = separator_end
+        self.cache = new_cache
+
+        # 문서 끝까지 닫히지 않은 태그 (같은 태그에서 연 속성은 한 번만 표시)
+        for tag_span in set(open_attributes.values()):
+            diagnostics.append((*tag_span, "닫히지 않은 스팬 태그 (</TC>로 닫아야 합니다)"))
+        if fn_open_span is not None:
+            diagnostics.append((*fn_open_span, "닫히지 않은 <fn> 태그"))
+        diagnostics.sort()
+        return diagnostics
+
+    @staticmethod
+    def check_block(block, open_attribute_names=frozenset(), fn_open=False):
+        # 블록 하나를 검사하여 (진단 목록, 블록 끝의 열린 속성, 블록 끝의 <fn> 상태)를 반환
+        # 위치는 모두 블록 기준이며, 이전 블록에서 열려 아직 닫히지 않은 태그의 위치는 빈 튜플로 표시
+        diagnostics = []
+        open_attributes = {attribute: () for attribute in open_attribute_names} # 열린 속성 -> 그 속성을 연 태그의 (시작, 끝)
+        fn_open_span = () if fn_open else None # 열린 <fn> 태그의 (시작, 끝)
+        offset = 0
+        for kind, token in tokenize_pgml(block):
+            token_span = (offset, offset + len(token))
+            offset += len(token)
+            if kind == "open":
+                for attribute_name, attribute in span_tag_attributes(token):
+                    if attribute_name == "C":
+                        problem = color_attribute_problem(attribute)
+                        if problem:
+                            diagnostics.append((*token_span, problem))
+                    open_attributes.setdefault(attribute_name, token_span)
+            elif kind == "close_all":
+                if not open_attributes:
+                    diagnostics.append((*token_span, "열린 스팬 태그가 없는 </TC>"))
+                open_attributes.clear()
+            elif kind == "close":
+                attribute = span_close_attribute(token)
+                if open_attributes.pop(attribute, None) is None:
+                    diagnostics.append((*token_span, f"열리지 않은 {attribute} 속성을 닫는 태그"))
+            elif kind == "fn_open":
+                if fn_open_span is not None:
+                    diagnostics.append((*token_span, "<fn> 안에 중첩된 <fn> 태그"))
+                else:
+                    fn_open_span = token_span
+            elif kind == "fn_close":
+                if fn_open_span is None:
+                    diagnostics.append((*token_span, "<fn> 없이 사용된 </fn>"))
+                fn_open_span = None
+            elif kind == "text":
+                for broken_match in BROKEN_COLOR_TAG_PATTERN.finditer(token):
+                    diagnostics.append((token_span[0] + broken_match.start(), token_span[0] + broken_match.end(), "색상 태그로 인식되지 않는 잘못된 <C> 태그"))
+
+        # 표: 각 행의 항목 수가 첫 행과 같아야 함
+        for table_match in TABLE_PATTERN.finditer(block):
+            if not table_match.group(2):
+                diagnostics.append((table_match.start(), table_match.start() + len("<TB>"), "닫히지 않은 <TB> 태그"))
+            column_count = None
+            for row_match in TABLE_ROW_PATTERN.finditer(table_match.group(1)):
+                row_column_count = len(row_match.group(1).split(","))
+                if column_count is None:
+                    column_count = row_column_count
+                elif row_column_count != column_count:
+                    row_start = table_match.start(1) + row_match.start()
+                    diagnostics.append((row_start, row_start + len(row_match.group()), f"표의 행 항목 수({row_column_count}개)가 첫 행({column_count}개)과 다릅니다"))
+
+        diagnostics.sort()
+        return diagnostics, tuple(sorted(open_attributes.items())), fn_open_span
+
+
 # 메인 애플리케이션 실행
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_bulk_transform(sys.argv[1:]))
     root = tk.Tk()
     editor = MarkupEditor(root)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,314 @@
+# test_PGML_Editor.py
+# Tk 창 없이 실행할 수 있는 PGML_Editor 구성 요소 테스트 (python -m pytest)
+
+from types import SimpleNamespace
+
+import pytest
+
+import PGML_Editor
+from PGML_Editor import HeaderIndex, MarkupEditor
+
+
+def header_lines_by_scan(lines):
+    return [n for n, line in enumerate(lines) if PGML_Editor.HEADER_LINE_PATTERN.match(line)]
+
+
+def test_header_index_parses_both_header_forms():
+    index = HeaderIndex()
+    removed, added = index.update("# A\ntext\n## B\n<H3>C</H>\n<HL>not a header</TC>\n")
+    assert removed == []
+    assert [entry[1:] for entry in added] == [(1, "A"), (2, "B"), (3, "C")]
+    assert index.header_lines == [0, 2, 3]
+
+
+def test_header_index_shifts_lines_without_reporting_changes():
+    index = HeaderIndex()
+    index.update("# A\nbody\n# B")
+    assert index.update("new line\n# A\nbody\n# B") == ([], [])
+    assert index.header_lines == [1, 3]
+
+
+def test_header_index_reuses_ids_for_edited_headers():
+    index = HeaderIndex()
+    index.update("# A\nbody\n## B")
+    header_id = index.entries[1][0]
+    removed, added = index.update("# A\nbody\n## B2")
+    assert removed == [(header_id, 2, "B")]
+    assert added == [(header_id, 2, "B2")]
+    assert index.position(header_id) == 1
+    assert index.last_update_position == 1
+
+
+def test_header_index_does_not_reuse_ids_for_different_headers():
+    index = HeaderIndex()
+    index.update("# Doc A intro\nx\n# Doc A part 2\n")
+    old_ids = {entry[0] for entry in index.entries}
+    # 여러 줄이 바뀐 경우 (다른 문서를 열거나 디바운스 중에 헤더를 교체) 제목이 같은 헤더만 id 유지
+    removed, added = index.update("# Other doc\ny\n# Doc A part 2\nz\n")
+    assert {entry[0] for entry in added if entry[2] == "Other doc"}.isdisjoint(old_ids)
+    assert index.entries[1][0] in old_ids
+
+
+def test_header_index_matches_full_scan_after_edits():
+    index = HeaderIndex()
+    lines = ["# A", "x", "## B", "y", "<H2>C", "z"]
+    edits = [
+        lambda: lines.insert(0, "# top"),
+        lambda: lines.__delitem__(3),
+        lambda: lines.__setitem__(2, "text"),
+        lambda: lines.extend(["### D", "", "# E"]),
+        lambda: lines.__delitem__(slice(1, 4)),
+    ]
+    index.update("\n".join(lines))
+    for edit in edits:
+        edit()
+        index.update("\n".join(lines))
+        assert index.header_lines == header_lines_by_scan(lines)
+
+
+def test_preview_header_positions_count_headers_inside_footnotes():
+    editor = SimpleNamespace()
+    text = "<fn>x\n# inner\n</fn>\n# A\na\n# B\nb\n"
+    index = HeaderIndex()
+    index.update(text)
+    position_a = index.position(index.entries[1][0])
+
+    processed = MarkupEditor.process_markup_for_preview(editor, text, {position_a})
+    assert editor.preview_header_positions == [1, 2]
+    assert "<HEADER_H1>A</HEADER_H1>\n⋯\n<HEADER_H1>B</HEADER_H1>\nb" in processed
+
+
+def make_source_map(segments):
+    source_map = PGML_Editor.SourceMap()
+    for target, source, length in segments:
+        source_map.add(target, source, length)
+    return source_map
+
+
+def test_source_map_merges_contiguous_segments():
+    source_map = make_source_map([(0, 0, 3), (3, 3, 2), (10, 20, 4)])
+    assert list(zip(source_map.targets, source_map.sources, source_map.lengths)) == [(0, 0, 5), (10, 20, 4)]
+
+
+def test_source_map_lookups_clamp_dropped_text_to_previous_segment():
+    # 원본 "ab<B>cd" -> 대상 "abcd"
+    source_map = make_source_map([(0, 0, 2), (2, 5, 2)])
+    assert source_map.to_target(6) == 3
+    assert source_map.to_target(3) == 2 # 제거된 태그 내부
+    assert source_map.to_source(3) == 6
+    assert source_map.to_source(2) == 5
+
+
+def test_source_map_compose():
+    outer = make_source_map([(0, 0, 4), (4, 6, 4)]) # 대상 <- 중간
+    inner = make_source_map([(0, 10, 2), (2, 20, 6)]) # 중간 <- 원본
+    composed = outer.compose(inner)
+    assert list(zip(composed.targets, composed.sources, composed.lengths)) == [(0, 10, 2), (2, 20, 2), (4, 24, 2)]
+
+
+def test_line_offsets_round_trip():
+    line_starts = PGML_Editor.line_start_offsets("ab\ncde\n\nf")
+    assert list(line_starts) == [0, 3, 7, 8]
+    assert PGML_Editor.offset_to_text_index(line_starts, 5) == "2.2"
+    assert PGML_Editor.text_index_to_offset(line_starts, "4.1") == 9
+
+
+class PreviewStub:
+    # 미리보기 Text 위젯 대신 삽입된 (텍스트, 태그)와 설정된 색상 태그의 글자색만 기록
+    def __init__(self):
+        self.segments = []
+        self.colors = []
+
+    def insert(self, index, text, tags=()):
+        self.segments.append((text, tags))
+
+    def tag_config(self, tag, **options):
+        if tag.startswith("color_"):
+            self.colors.append(options["foreground"])
+
+    def text(self):
+        return "".join(text for text, tags in self.segments)
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def render_preview(text):
+    editor = SimpleNamespace(preview_text=PreviewStub(), preview_header_marks=[], PREDEFINED_COLORS=MarkupEditor.PREDEFINED_COLORS)
+    MarkupEditor.apply_styles_to_preview(editor, MarkupEditor.process_markup_for_preview(editor, text))
+    return editor
+
+
+def test_preview_source_map_points_at_original_text():
+    text = "# Title\nhello <B>bold</TC> world<fn>note</fn> end\n<H2> Sub </H>\n"
+    editor = render_preview(text)
+    preview = editor.preview_text.text()
+    source_map = editor.preview_source_map
+    for word in ("Title", "bold", "world", "end", "Sub"):
+        source_offset = text.index(word)
+        preview_offset = source_map.to_target(source_offset)
+        assert preview[preview_offset:preview_offset + len(word)] == word
+        assert source_map.to_source(preview_offset) == source_offset
+    assert editor.preview_footnotes_data == {1: ("note", "normal")}
+
+
+
+def test_preview_source_map_stays_sorted_for_header_with_footnote():
+    text = "# Title<fn>note</fn> <B>more</TC>\nbody"
+    editor = render_preview(text)
+    assert editor.preview_text.text().startswith("Title[1] <B>more</TC>\n\nbody")
+    source_map = editor.preview_source_map
+    assert list(source_map.sources) == sorted(source_map.sources)
+    assert list(source_map.targets) == sorted(source_map.targets)
+    assert source_map.to_source(source_map.to_target(text.index("body"))) == text.index("body")
+
+SAMPLE_DOCUMENT = "# Title\n<B C=red>x</TC> `<C=red> <C = Blue, HL>y</B>\n## Sub<fn>note <C=green>g</TC></fn>\n<H3>kept</H>\ntext red\n#last"
+
+
+def test_tokenize_round_trip_and_kinds():
+    tokens = list(PGML_Editor.tokenize_pgml(SAMPLE_DOCUMENT))
+    assert "".join(token for kind, token in tokens) == SAMPLE_DOCUMENT
+    assert ("open", "<B C=red>") in tokens
+    assert ("escape", "`<") in tokens
+    assert ("close", "</B>") in tokens
+    assert ("fn_open", "<fn>") in tokens
+    assert ("header", "<H3>") in tokens
+    assert ("header_close", "</H>") in tokens
+
+
+def test_bulk_transform_rules():
+    transform = PGML_Editor.build_bulk_transform(colors_to_hex=True, headers_to_tags=True, replacements=[("red", "RED")])
+    assert transform.apply(SAMPLE_DOCUMENT) == (
+        "<H1> Title</H>\n"
+        "<B C=#FF0000>x</TC> `<C=RED> <C = #0000FF, HL>y</B>\n"
+        "<H2> Sub<fn>note <C=#00FF00>g</TC></fn></H>\n"
+        "<H3>kept</H>\n"
+        "text RED\n"
+        "<H1>last</H>"
+    )
+
+
+def test_header_conversion_closes_outside_multi_line_footnotes():
+    transform = PGML_Editor.build_bulk_transform(headers_to_tags=True)
+    converted = transform.apply("## Sub<fn>note\nmore</fn>\nbody\n<fn>x\n# inner</fn> tail\n#last<fn>open")
+    assert converted == "<H2> Sub<fn>note\nmore</fn></H>\nbody\n<fn>x\n<H1> inner</H></fn> tail\n<H1>last<fn>open"
+    assert MarkupEditor.process_markup_for_save(converted).endswith("각주 목록:\n[1] note\nmore\n[2] x\n<H1> inner</H>\n")
+
+
+def test_bulk_transform_keeps_escapes_and_unknown_colors():
+    transform = PGML_Editor.build_bulk_transform(colors_to_hex=True)
+    assert transform.apply("`<C=red> <C=purple>p</TC>") == "`<C=red> <C=purple>p</TC>"
+
+
+def test_transform_directory_only_rewrites_changed_bodies(tmp_path):
+    (tmp_path / "sub").mkdir()
+    changed = tmp_path / "a.pml"
+    changed.write_text("<C=red>a</TC><fn>one</fn>\n\n---\n각주 목록:\n[1] stale\n", encoding="utf-8")
+    unchanged = tmp_path / "sub" / "b.pgml"
+    unchanged.write_text("hello\n", encoding="utf-8")
+    broken = tmp_path / "c.pml"
+    broken.write_bytes(b"<C=red>\xff\xfe")
+    ignored = tmp_path / "d.txt"
+    ignored.write_text("<C=red>", encoding="utf-8")
+
+    changed_paths, failures = PGML_Editor.transform_directory(str(tmp_path), PGML_Editor.build_bulk_transform(colors_to_hex=True))
+
+    assert changed_paths == [str(changed)]
+    assert [path for path, error in failures] == [str(broken)]
+    assert changed.read_text(encoding="utf-8") == "<C=#FF0000>a</TC><fn>one</fn>\n\n---\n각주 목록:\n[1] one\n"
+    assert unchanged.read_text(encoding="utf-8") == "hello\n"
+    assert ignored.read_text(encoding="utf-8") == "<C=red>"
+
+
+@pytest.mark.parametrize("argv", [["."], ["missing-directory", "--colors-to-hex"]])
+def test_run_bulk_transform_rejects_bad_arguments(argv):
+    with pytest.raises(SystemExit) as exc_info:
+        PGML_Editor.run_bulk_transform(argv)
+    assert exc_info.value.code == 2
+
+
+def diagnostic_messages(text):
+    return [(text[start:end], message) for start, end, message in PGML_Editor.DiagnosticsEngine().run(text)]
+
+
+@pytest.mark.parametrize("text", [
+    "<B>ok</TC> <B I>x</I> y</TC>",
+    "<C=red>a</TC> <C=FF0000>b</TC> <C=F00>c</TC> <C=#00ff00>d</TC> <C(255,,)>e</TC> <C(0,100,100,0)>f</TC>",
+    "<fn>a\n\nb</fn>",
+    "<B>a\n\nb</TC>",
+    "`<C=nope> `</TC>",
+    "<TB>(a,b)\n(1,2)</TB>",
+])
+def test_diagnostics_accept_valid_documents(text):
+    assert diagnostic_messages(text) == []
+
+
+def test_diagnostics_report_problems():
+    text = (
+        "</TC> </B>\n"
+        "<C=purple>p</TC> <C(300,0,0)>r</TC> <C(0,120,0,0)>k</TC> <C(1,2)>m</TC> <C=#12345>h</TC>\n"
+        "<C(255,0,0>broken\n"
+        "\n"
+        "<fn>a<fn>b</fn> </fn>\n"
+        "<TB>(a,b,c)\n(1,2)\n"
+        "\n"
+        "<HL>never closed <fn>open"
+    )
+    assert diagnostic_messages(text) == [
+        ("</TC>", "열린 스팬 태그가 없는 </TC>"),
+        ("</B>", "열리지 않은 B 속성을 닫는 태그"),
+        ("<C=purple>", "알 수 없는 색상명: purple"),
+        ("<C(300,0,0)>", "RGB 값은 0~255 범위여야 합니다: C(300,0,0)"),
+        ("<C(0,120,0,0)>", "CMYK 값은 0~100 범위여야 합니다: C(0,120,0,0)"),
+        ("<C(1,2)>", "잘못된 색상 형식: C(1,2) (RGB는 값 3개, CMYK는 값 4개)"),
+        ("<C=#12345>", "잘못된 HEX 색상 값: C=#12345"),
+        ("<C(", "색상 태그로 인식되지 않는 잘못된 <C> 태그"),
+        ("<fn>", "<fn> 안에 중첩된 <fn> 태그"),
+        ("</fn>", "<fn> 없이 사용된 </fn>"),
+        ("<TB>", "닫히지 않은 <TB> 태그"),
+        ("(1,2)", "표의 행 항목 수(2개)가 첫 행(3개)과 다릅니다"),
+        ("<HL>", "닫히지 않은 스팬 태그 (</TC>로 닫아야 합니다)"),
+        ("<fn>", "닫히지 않은 <fn> 태그"),
+    ]
+
+
+def test_diagnostics_reuse_cached_blocks_with_same_incoming_state():
+    engine = PGML_Editor.DiagnosticsEngine()
+    engine.run("<B>a\n\nb</TC>\n\n<C=purple>x</TC>")
+    cached_keys = set(engine.cache)
+    diagnostics = engine.run("new\n\n<B>a\n\nb</TC>\n\n<C=purple>x</TC>")
+    assert cached_keys <= set(engine.cache)
+    assert [message for start, end, message in diagnostics] == ["알 수 없는 색상명: purple"]
+
+
+@pytest.mark.parametrize("arguments, expected", [
+    (("red", None, ()), "#ff0000"),
+    (("FF0000", None, ()), "#ff0000"),
+    (("purple", None, ()), None),
+    ((None, "0f0", ()), "#00ff00"),
+    ((None, "12345", ()), None),
+    ((None, None, ("300", "", "0")), "#ff0000"),
+    ((None, None, ("0", "120", "0", "0")), "#ff00ff"),
+    ((None, None, ("1", "2")), None),
+])
+def test_pgml_color_to_hex(arguments, expected):
+    assert PGML_Editor.pgml_color_to_hex(*arguments) == expected
+
+
+def test_preview_only_configures_valid_colors():
+    text = "<C(300,0,0)>a</TC><C(0,120,0,0)>b</TC><C=FF0000>c</TC><C=#12345>d</TC>\n"
+    editor = render_preview(text)
+    assert editor.preview_text.colors == ["#ff0000", "#ff00ff", "#ff0000"]
+
+
+@pytest.mark.parametrize("text, expected_segments", [
+    ("<C(F00)>red</TC>", [("red", {"color_#FF0000"})]),
+    ("<C(#FF0000)>x</TC>", [("x", {"color_#FF0000"})]),
+    ("<B I>bi</B> i</TC>", [("bi", {"bold", "italic"}), (" i", {"italic"})]),
+    ("<B, I>x</TC> `<B>y", [("x", {"bold", "italic"}), (" ", set()), ("<B>y", set())]),
+])
+def test_preview_renders_tags_accepted_by_diagnostics(text, expected_segments):
+    # 진단에서 문제가 없는 태그는 미리보기에서 글자로 남지 않고 서식으로 적용되어야 함
+    assert diagnostic_messages(text) == []
+    segments = render_preview(text).preview_text.segments
+    assert [(segment, set(tags)) for segment, tags in segments] == expected_segments